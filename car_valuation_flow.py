@@ -17,6 +17,18 @@ from car_valuation_analyzer import (
 _brands_cache: Optional[List[str]] = None
 _fuel_types_cache: Optional[List[str]] = None
 
+# Bare requests to start a valuation; they carry no car details, so there is
+# nothing for the LLM analysis to extract
+_KNOWN_VALUATION_TRIGGERS = frozenset({
+    "value my car",
+    "how much is my car worth",
+    "car valuation",
+    "i want to sell my car",
+    "what's the price of my car",
+})
+
+_ASK_BRAND_MESSAGE = "Great! I'd be happy to help you get your car valued! 🚗💰\n\nWhich brand is your car?"
+
 # Condition multipliers for valuation
 CONDITION_MULTIPLIERS = {
     "excellent": 1.0,
@@ -285,6 +297,19 @@ async def handle_car_valuation_flow(
             "What would you like to do?"
         )
     
+    # Fast path: a bare valuation request just starts the flow
+    if (state is None or state.flow_name != "car_valuation") and message_lower in _KNOWN_VALUATION_TRIGGERS:
+        conversation_manager.set_state(
+            user_id,
+            ConversationState(
+                user_id=user_id,
+                flow_name="car_valuation",
+                step="collecting_info",
+                data={"brand": None, "model": None, "year": None, "fuel_type": None, "condition": None}
+            )
+        )
+        return _ASK_BRAND_MESSAGE
+    
     # Get available brands and fuel types from database
     available_brands = await get_brands_from_db()
     available_fuel_types = await get_fuel_types_from_db()
@@ -338,7 +363,7 @@ async def handle_car_valuation_flow(
                 print(f"Error generating response: {e}")
                 # Fallback to simple response
                 if not brand:
-                    return "Great! I'd be happy to help you get your car valued! 🚗💰\n\nWhich brand is your car?"
+                    return _ASK_BRAND_MESSAGE
                 elif not model:
                     return f"Perfect! I see you have a {brand} car. That's great! 👍\n\nWhat's the model name?"
                 elif not year:
@@ -366,7 +391,7 @@ async def handle_car_valuation_flow(
             )
             
             if not brand:
-                return "Great! I'd be happy to help you get your car valued! 🚗💰\n\nWhich brand is your car?"
+                return _ASK_BRAND_MESSAGE
             elif not year:
                 return f"Perfect! I see you have a {brand} car. What year was it manufactured?"
             elif not condition:
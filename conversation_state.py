@@ -1,6 +1,6 @@
 """Conversation state management for multi-turn dialogues."""
 
-from typing import Dict, Optional, Any
+from typing import Dict, Iterable, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
@@ -72,6 +72,27 @@ class ConversationManager:
         if user_id in self._states:
             del self._states[user_id]
     
+    def clear_state_if_present(self, user_id: str) -> bool:
+        """Clear conversation state for a user, returning whether there was any."""
+        return self._states.pop(user_id, None) is not None
+    
+    def clear_states(self, user_ids: Iterable[str]) -> None:
+        """Clear conversation state for several users at once."""
+        pop = self._states.pop
+        for user_id in user_ids:
+            pop(user_id, None)
+    
+    def seed_state(self, user_id: str, *, step: str, **data) -> ConversationState:
+        """Set the step and merge data fields in a single state write."""
+        state = self.get_state(user_id)
+        if state is None:
+            state = ConversationState(user_id=user_id)
+        
+        state.step = step
+        state.data.update(data)
+        self.set_state(user_id, state)
+        return state
+    
     def update_data(self, user_id: str, **data) -> ConversationState:
         """Update data dictionary in conversation state."""
         state = self.get_state(user_id)
@@ -2,8 +2,9 @@
 
 import os
 import random
+import asyncio
 import asyncpg
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 from dotenv import load_dotenv
@@ -57,6 +58,64 @@ class Car:
         }
 
 
+_INSERT_SERVICE_BOOKING_SQL = """
+    INSERT INTO service_bookings 
+    (customer_name, customer_phone, vehicle_make, vehicle_model, vehicle_year, registration_number, service_type, status, notes, created_at, updated_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, 'pending', $8, NOW(), NOW())
+    RETURNING id
+"""
+
+_INSERT_SERVICE_BOOKING_FALLBACK_SQL = """
+    INSERT INTO test_drive_bookings 
+    (confirmation_id, customer_name, customer_phone, vehicle_id, car_name, location, status, notes, created_at, updated_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), NOW())
+    RETURNING id
+"""
+
+
+def _service_booking_row(
+    customer_name: str,
+    phone_number: str,
+    make: Optional[str] = None,
+    model: Optional[str] = None,
+    year: Optional[int] = None,
+    registration_number: Optional[str] = None,
+    service_type: Optional[str] = None,
+    confirmation_id: Optional[str] = None
+) -> Tuple[Any, ...]:
+    """Build the service_bookings insert parameters, including the notes column."""
+    # Build vehicle info string
+    vehicle_parts = []
+    if make:
+        vehicle_parts.append(f"Make: {make}")
+    if model:
+        vehicle_parts.append(f"Model: {model}")
+    if year:
+        vehicle_parts.append(f"Year: {year}")
+    if registration_number:
+        vehicle_parts.append(f"Registration: {registration_number}")
+    vehicle_info = "; ".join(vehicle_parts) if vehicle_parts else "Vehicle details not provided"
+    
+    # Build notes with service type
+    notes_parts = [vehicle_info]
+    if service_type:
+        notes_parts.append(f"Service Type: {service_type}")
+    if confirmation_id:
+        notes_parts.append(f"Booking ID: {confirmation_id}")
+    notes = " | ".join(notes_parts)
+    
+    return (
+        customer_name,
+        phone_number,
+        make,
+        model,
+        year,
+        registration_number,
+        service_type,
+        notes,
+    )
+
+
 class CarDatabase:
     """Database operations for cars."""
     
@@ -225,74 +284,82 @@ class CarDatabase:
         model: Optional[str] = None,
         year: Optional[int] = None,
         registration_number: Optional[str] = None,
-        service_type: Optional[str] = None
+        service_type: Optional[str] = None,
+        confirmation_id: Optional[str] = None
     ) -> int:
-        """Create a service booking."""
-        await self.connect()
+        """Create a service booking.
         
-        # Build vehicle info string
-        vehicle_parts = []
-        if make:
-            vehicle_parts.append(f"Make: {make}")
-        if model:
-            vehicle_parts.append(f"Model: {model}")
-        if year:
-            vehicle_parts.append(f"Year: {year}")
-        if registration_number:
-            vehicle_parts.append(f"Registration: {registration_number}")
-        vehicle_info = "; ".join(vehicle_parts) if vehicle_parts else "Vehicle details not provided"
+        ``confirmation_id`` is the booking ID shown to the customer; it is stored
+        with the row so the booking can be looked up by it later.
+        """
+        results = await self.create_service_bookings([{
+            "customer_name": customer_name,
+            "phone_number": phone_number,
+            "make": make,
+            "model": model,
+            "year": year,
+            "registration_number": registration_number,
+            "service_type": service_type,
+            "confirmation_id": confirmation_id,
+        }])
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return results[0]
+    
+    async def create_service_bookings(
+        self, bookings: List[Dict[str, Any]]
+    ) -> List[Union[int, Exception]]:
+        """Create several service bookings in a single transaction.
+        
+        Each booking is a dict of ``create_service_booking`` keyword arguments.
+        Returns one result per booking, in order: the booking ID, or the exception
+        that prevented it from being saved. Each insert runs under its own
+        savepoint, so a failing row falls back to the test_drive_bookings table
+        (or fails) on its own without rolling back the rest of the batch.
+        """
+        await self.connect()
         
-        # Build notes with service type
-        notes_parts = [vehicle_info]
-        if service_type:
-            notes_parts.append(f"Service Type: {service_type}")
-        notes = " | ".join(notes_parts)
+        rows = [_service_booking_row(**booking) for booking in bookings]
         
         async with self._pool.acquire() as conn:
-            # Try to insert into service_bookings table if it exists
-            # Otherwise, use test_drive_bookings table as fallback
-            try:
-                booking_id = await conn.fetchval(
-                    """
-                    INSERT INTO service_bookings 
-                    (customer_name, customer_phone, vehicle_make, vehicle_model, vehicle_year, registration_number, service_type, status, notes, created_at, updated_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, 'pending', $8, NOW(), NOW())
-                    RETURNING id
-                    """,
-                    customer_name,
-                    phone_number,
-                    make,
-                    model,
-                    year,
-                    registration_number,
-                    service_type,
-                    notes
-                )
-                return booking_id
-            except Exception:
-                # Fallback: use test_drive_bookings table
-                # Generate confirmation_id for service booking
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                random_suffix = random.randint(1000, 9999)
-                confirmation_id = f"SB{timestamp}{random_suffix}"
-                
-                booking_id = await conn.fetchval(
-                    """
-                    INSERT INTO test_drive_bookings 
-                    (confirmation_id, customer_name, customer_phone, vehicle_id, car_name, location, status, notes, created_at, updated_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), NOW())
-                    RETURNING id
-                    """,
-                    confirmation_id,
-                    customer_name,
-                    phone_number,
-                    None,  # vehicle_id
-                    f"{make} {model}" if make and model else "Service Booking",
-                    "service_booking",  # location
-                    'pending',  # status
-                    notes  # notes
-                )
-                return booking_id
+            async with conn.transaction():
+                results: List[Union[int, Exception]] = []
+                for booking, row in zip(bookings, rows):
+                    # Try to insert into service_bookings table if it exists
+                    # Otherwise, use test_drive_bookings table as fallback
+                    try:
+                        async with conn.transaction():
+                            results.append(await conn.fetchval(_INSERT_SERVICE_BOOKING_SQL, *row))
+                        continue
+                    except Exception:
+                        pass
+                    
+                    # Fallback: use test_drive_bookings table
+                    (customer_name, phone_number, make, model, _year,
+                     _registration_number, _service_type, notes) = row
+                    # Keep the confirmation_id shown to the customer, or generate one
+                    confirmation_id = booking.get("confirmation_id")
+                    if not confirmation_id:
+                        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+                        random_suffix = random.randint(1000, 9999)
+                        confirmation_id = f"SB{timestamp}{random_suffix}"
+                    
+                    try:
+                        async with conn.transaction():
+                            results.append(await conn.fetchval(
+                                _INSERT_SERVICE_BOOKING_FALLBACK_SQL,
+                                confirmation_id,
+                                customer_name,
+                                phone_number,
+                                None,  # vehicle_id
+                                f"{make} {model}" if make and model else "Service Booking",
+                                "service_booking",  # location
+                                'pending',  # status
+                                notes  # notes
+                            ))
+                    except Exception as e:
+                        results.append(e)
+                return results
     
     async def init_schema(self):
         """Initialize database schema (create tables if they don't exist)."""
@@ -335,6 +402,125 @@ class CarDatabase:
                 print(f"⚠ Error creating indexes: {e}")
 
 
+class ServiceBookingBatcher:
+    """Coalesces service bookings that arrive close together into one transaction.
+    
+    Bookings queued within ``flush_interval`` seconds of the first one (up to
+    ``max_batch_size``) are written by a background task with a single commit.
+    A batch that takes longer than ``write_timeout`` seconds is left to finish
+    on its own so later batches aren't held up behind it.
+    """
+    
+    def __init__(
+        self,
+        db: CarDatabase,
+        flush_interval: float = 0.02,
+        max_batch_size: int = 50,
+        write_timeout: float = 2.0,
+    ):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.write_timeout = write_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slow_writes: set = set()
+    
+    def put(self, **booking: Any) -> "asyncio.Future[int]":
+        """Queue a booking for writing.
+        
+        Takes the same keyword arguments as ``CarDatabase.create_service_booking``.
+        The returned future resolves to the booking ID once its batch is committed,
+        or raises the error that stopped this booking from being saved.
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        self._queue.put_nowait((booking, future))
+        return future
+    
+    async def close(self):
+        """Write any queued bookings and stop the background task."""
+        if self._worker is None or self._worker.done():
+            return
+        self._queue.put_nowait(None)
+        await self._worker
+        self._worker = None
+        
+        # Let writes that outlived write_timeout finish before the pool is closed
+        if self._slow_writes:
+            await asyncio.wait(self._slow_writes)
+    
+    async def _run(self):
+        """Collect queued bookings into batches and write them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush(batch)
+            if stopping:
+                return
+    
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], "asyncio.Future[int]"]]):
+        """Write one batch, waiting at most ``write_timeout`` before moving on."""
+        write = asyncio.ensure_future(
+            self.db.create_service_bookings([booking for booking, _ in batch])
+        )
+        write.add_done_callback(lambda done: self._resolve(batch, done))
+        
+        finished, _ = await asyncio.wait({write}, timeout=self.write_timeout)
+        if not finished:
+            # Don't cancel: that would roll the bookings back. Let it finish in the background.
+            print(f"⚠ Service booking write exceeded {self.write_timeout}s, continuing in background")
+            self._slow_writes.add(write)
+            write.add_done_callback(self._slow_writes.discard)
+    
+    @staticmethod
+    def _resolve(batch: List[Tuple[Dict[str, Any], "asyncio.Future[int]"]], write: "asyncio.Future[List[Union[int, Exception]]]"):
+        """Resolve each booking's future from its own result in the finished batch write."""
+        if write.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        
+        exc = write.exception()
+        if exc is not None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        
+        for (_, future), result in zip(batch, write.result()):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
 # Global database instance
 car_db = CarDatabase(DATABASE_URL) if DATABASE_URL else None
+service_booking_batcher = ServiceBookingBatcher(car_db) if car_db else None
 
@@ -4,7 +4,10 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import hmac
 import hashlib
+import logging
+import logging.handlers
 import os
+import queue
 from typing import Optional
 import uvicorn
 from dotenv import load_dotenv
@@ -18,16 +21,52 @@ from intent_service import (
 )
 from conversation_state import conversation_manager
 from browse_car_flow import handle_browse_car_flow
-from database import car_db
+from database import car_db, service_booking_batcher
 
 # Load environment variables
 load_dotenv()
 
 
+# Queue handler installed on the root logger by configure_logging
+_log_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """Send log records through a queue so they are written by a background thread.
+
+    The root logger gets a handler that only enqueues records, which keeps stdout
+    writes off the event loop; its level is left as configured. Calling this again
+    replaces the previous handler rather than adding a second one. The returned
+    listener must be stopped on shutdown to flush any queued records.
+    """
+    global _log_queue_handler
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    
+    root_logger = logging.getLogger()
+    if _log_queue_handler is not None:
+        root_logger.removeHandler(_log_queue_handler)
+    _log_queue_handler = logging.handlers.QueueHandler(log_queue)
+    root_logger.addHandler(_log_queue_handler)
+    
+    # httpx logs each request URL at INFO, and the Gemini URLs carry the API key
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    
+    listener.start()
+    return listener
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan - startup and shutdown."""
     # Startup
+    log_listener = configure_logging()
+    
     if car_db:
         try:
             await car_db.init_schema()
@@ -38,12 +77,21 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if service_booking_batcher:
+        try:
+            await service_booking_batcher.close()
+            print("✓ Pending service bookings written")
+        except Exception as e:
+            print(f"⚠ Service booking flush error: {e}")
+    
     if car_db:
         try:
             await car_db.close()
             print("✓ Database connections closed")
         except Exception as e:
             print(f"⚠ Database shutdown error: {e}")
+    
+    log_listener.stop()
 
 
 app = FastAPI(title="WhatsApp Webhook API", version="1.0.0", lifespan=lifespan)
@@ -8,6 +8,13 @@ import sys
 from test_matrix import main
 
 if __name__ == "__main__":
+    # Use uvloop's faster event loop when it is installed (not available on Windows)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
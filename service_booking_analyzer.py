@@ -6,11 +6,30 @@ import httpx
 from typing import Optional, Dict, Any
 from intent_service import ResponseGenerationError, DEFAULT_GEMINI_MODEL
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 _API_URL_TEMPLATE = (
     "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
 )
 
 
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    """Encode a request payload as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _loads(data: Any) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class ServiceBookingAnalysisError(RuntimeError):
     """Raised when service booking analysis fails."""
 
@@ -148,7 +167,7 @@ Important:
         "url": url,
         "params": {"key": api_key},
         "headers": {"Content-Type": "application/json"},
-        "json": payload,
+        "content": _dumps(payload),
         "timeout": timeout,
     }
     
@@ -168,7 +187,7 @@ Important:
             f"Gemini API request failed with status {exc.response.status_code}"
         ) from exc
     
-    payload = response.json()
+    payload = _loads(response.content)
     try:
         candidate_text = (
             payload["candidates"][0]["content"]["parts"][0]["text"]
@@ -179,7 +198,7 @@ Important:
         ) from exc
     
     try:
-        parsed = json.loads(candidate_text)
+        parsed = _loads(candidate_text)
         
         return {
             "extracted_service": parsed.get("extracted_service"),
@@ -302,7 +321,7 @@ Generate a natural response:"""
         "url": url,
         "params": {"key": api_key},
         "headers": {"Content-Type": "application/json"},
-        "json": payload,
+        "content": _dumps(payload),
         "timeout": timeout,
     }
     
@@ -322,7 +341,7 @@ Generate a natural response:"""
             f"Gemini API request failed with status {exc.response.status_code}"
         ) from exc
     
-    payload = response.json()
+    payload = _loads(response.content)
     try:
         generated_text = (
             payload["candidates"][0]["content"]["parts"][0]["text"]
@@ -1,11 +1,16 @@
 """Service Booking Flow Handler."""
 
+import asyncio
+import logging
 import re
-from typing import Optional, List, Dict, Any
+import time
+import uuid
+from collections import ChainMap, OrderedDict
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import datetime
 from conversation_state import conversation_manager, ConversationState
-from database import car_db
-from intent_service import generate_response
+from database import car_db, service_booking_batcher
+from intent_service import generate_response, ResponseGenerationError
 from service_booking_analyzer import (
     analyze_service_booking_message,
     generate_service_booking_response,
@@ -14,19 +19,26 @@ from service_booking_analyzer import (
     SERVICE_TYPES,
 )
 
-# Cache for brands (fetched from database)
+logger = logging.getLogger(__name__)
+
+# Cache for brands (fetched from database), refreshed after _BRANDS_CACHE_TTL seconds
 _brands_cache: Optional[List[str]] = None
+_brands_cache_expires_at = 0.0
+_BRANDS_CACHE_TTL = 60.0
 
 
 async def get_brands_from_db() -> List[str]:
-    """Get available brands from database."""
-    global _brands_cache
-    if _brands_cache is None and car_db:
+    """Get available brands from database, fetching at most once per cache TTL."""
+    global _brands_cache, _brands_cache_expires_at
+    if car_db and (_brands_cache is None or time.monotonic() >= _brands_cache_expires_at):
         try:
             _brands_cache = await car_db.get_available_brands()
         except Exception as e:
-            print(f"Error fetching brands from database: {e}")
-            _brands_cache = []
+            logger.error("Error fetching brands from database: %s", e)
+            # Keep serving the last known brands until the next refresh
+            if _brands_cache is None:
+                _brands_cache = []
+        _brands_cache_expires_at = time.monotonic() + _BRANDS_CACHE_TTL
     return _brands_cache or []
 
 
@@ -36,20 +48,83 @@ def clear_brands_cache():
     _brands_cache = None
 
 
+# Cache for message analyses, keyed by (step, normalized message, conversation data, brands)
+_analysis_cache: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+_ANALYSIS_CACHE_SIZE = 512
+
+# Steps whose analysis depends on personal details and must never be shared
+_UNCACHED_ANALYSIS_STEPS = frozenset({"collecting_customer_details"})
+
+
+async def _analyze_with_cache(
+    message: str,
+    conversation_context: Dict[str, Any],
+    available_brands: List[str],
+) -> Dict[str, Any]:
+    """Analyze a message, reusing the result for a repeated message in the same context.
+    
+    Short replies such as "yes", "1" or a brand name recur across conversations,
+    so repeats are served without another LLM round-trip. The key includes the
+    conversation data and brands, so a result is only reused when everything the
+    analyzer saw was identical. Failed analyses and customer details are not cached.
+    """
+    step = conversation_context.get("step")
+    if step in _UNCACHED_ANALYSIS_STEPS:
+        return await analyze_service_booking_message(
+            message=message,
+            conversation_context=conversation_context,
+            available_brands=available_brands,
+        )
+    
+    key = (
+        step,
+        message.strip().lower(),
+        tuple(sorted(conversation_context.get("data", {}).items())),
+        tuple(available_brands),
+    )
+    analysis = _analysis_cache.get(key)
+    if analysis is not None:
+        _analysis_cache.move_to_end(key)
+        return analysis
+    
+    analysis = await analyze_service_booking_message(
+        message=message,
+        conversation_context=conversation_context,
+        available_brands=available_brands,
+    )
+    _analysis_cache[key] = analysis
+    if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+    return analysis
+
+
+def clear_analysis_cache():
+    """Clear cached message analyses."""
+    _analysis_cache.clear()
+
+
+# Year patterns, tried in order (4-digit years 1990-2039, or "year: 2020" / "2020 year")
+_YEAR_PATTERNS = (
+    re.compile(r'\b(19[9]\d|20[0-3]\d)\b'),
+    re.compile(r'year\s*[:\-]?\s*(\d{4})'),
+    re.compile(r'(\d{4})\s*year'),
+)
+
+# Pattern for Indian registration numbers: XX##XX####
+_REGISTRATION_PATTERN = re.compile(r'\b([A-Z]{2}\d{2}[A-Z]{1,2}\d{4})\b')
+
+_DIGITS_PATTERN = re.compile(r'\d+')
+
+
 def extract_year_from_message(message: str) -> Optional[int]:
     """Extract year from message. Returns 4-digit year."""
-    # Look for 4-digit years (1990-2030)
-    patterns = [
-        r'\b(19[9]\d|20[0-3]\d)\b',  # 1990-2039
-        r'year\s*[:\-]?\s*(\d{4})',
-        r'(\d{4})\s*year',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, message)
+    current_year = None
+    for pattern in _YEAR_PATTERNS:
+        match = pattern.search(message)
         if match:
             year = int(match.group(1))
-            current_year = datetime.now().year
+            if current_year is None:
+                current_year = datetime.now().year
             if 1990 <= year <= current_year:
                 return year
     
@@ -58,14 +133,33 @@ def extract_year_from_message(message: str) -> Optional[int]:
 
 def extract_registration_number(message: str) -> Optional[str]:
     """Extract registration number from message."""
-    # Pattern for Indian registration numbers: XX##XX####
-    pattern = r'\b([A-Z]{2}\d{2}[A-Z]{1,2}\d{4})\b'
-    match = re.search(pattern, message.upper())
+    match = _REGISTRATION_PATTERN.search(message.upper())
     if match:
         return match.group(1)
     return None
 
 
+# Stop scanning once this many digits have been seen; a phone number never needs more
+_MAX_PHONE_DIGITS = 20
+
+
+def extract_phone_number(message: str) -> Optional[str]:
+    """Extract a 10-digit phone number from message.
+    
+    Uses the last 10 digits when more are present (e.g. a leading country code).
+    Stops after the first 20 digits so very long messages aren't fully scanned.
+    """
+    digits = []
+    for char in message:
+        if char.isdecimal():
+            digits.append(char)
+            if len(digits) >= _MAX_PHONE_DIGITS:
+                break
+    if len(digits) < 10:
+        return None
+    return "".join(digits[-10:])
+
+
 async def extract_brand_from_message(message: str) -> Optional[str]:
     """Extract car brand from user message by checking against database brands."""
     message_lower = message.lower()
@@ -123,37 +217,218 @@ def format_services_list() -> str:
     return message
 
 
+class _MissingAsNotAvailable(dict):
+    """Mapping that renders missing booking fields as N/A."""
+    
+    def __missing__(self, key: str) -> str:
+        return "N/A"
+
+
+_SERVICE_BOOKING_CONFIRMATION_TEMPLATE = (
+    "✅ *Service Booking Confirmed!*\n\n"
+    "*Booking ID:* #{booking_id}\n\n"
+    "*Service Details:*\n"
+    "• Service: {service}\n"
+    "• Service Type: {service_type}\n\n"
+    "*Vehicle Details:*\n"
+    "• Make: {make}\n"
+    "• Model: {model}\n"
+    "• Year: {year}\n"
+    "• Registration: {registration_number}\n\n"
+    "*Customer Details:*\n"
+    "• Name: {customer_name}\n"
+    "• Phone: {phone_number}\n\n"
+    "Our team will call you back shortly to confirm the details and schedule your service! 📞\n\n"
+    "Is there anything else I can help you with?"
+)
+
+
 def format_service_booking_confirmation(booking_data: Dict[str, Any]) -> str:
     """Format service booking confirmation message."""
-    service = booking_data.get("service", "N/A")
-    make = booking_data.get("make", "N/A")
-    car_model = booking_data.get("model", "N/A")
-    year = booking_data.get("year", "N/A")
-    registration = booking_data.get("registration_number", "N/A")
-    service_type = booking_data.get("service_type", "N/A")
-    booking_id = booking_data.get("booking_id", "N/A")
-    customer_name = booking_data.get("customer_name", "N/A")
-    phone = booking_data.get("phone_number", "N/A")
+    return _SERVICE_BOOKING_CONFIRMATION_TEMPLATE.format_map(
+        _MissingAsNotAvailable(booking_data)
+    )
+
+
+# Booking dicts are only needed until the confirmation is formatted, so they are reused
+_booking_data_pool: List[Dict[str, Any]] = []
+_BOOKING_DATA_POOL_SIZE = 64
+
+
+def _build_booking_data(data: Dict[str, Any], customer_name: str, phone: str) -> Dict[str, Any]:
+    """Build the booking record from the details collected in the conversation.
     
-    message = (
-        f"✅ *Service Booking Confirmed!*\n\n"
-        f"*Booking ID:* #{booking_id}\n\n"
-        f"*Service Details:*\n"
-        f"• Service: {service}\n"
-        f"• Service Type: {service_type}\n\n"
-        f"*Vehicle Details:*\n"
-        f"• Make: {make}\n"
-        f"• Model: {car_model}\n"
-        f"• Year: {year}\n"
-        f"• Registration: {registration}\n\n"
-        f"*Customer Details:*\n"
-        f"• Name: {customer_name}\n"
-        f"• Phone: {phone}\n\n"
-        f"Our team will call you back shortly to confirm the details and schedule your service! 📞\n\n"
-        f"Is there anything else I can help you with?"
+    The dict comes from a small pool; hand it back with ``_release_booking_data``.
+    """
+    booking_data = _booking_data_pool.pop() if _booking_data_pool else {}
+    get = data.get
+    booking_data["service"] = "Vehicle Servicing & Repairs"  # Default service
+    booking_data["make"] = get("make")
+    booking_data["model"] = get("model")
+    booking_data["year"] = get("year")
+    booking_data["registration_number"] = get("registration_number")
+    booking_data["service_type"] = get("service_type")
+    booking_data["customer_name"] = customer_name
+    booking_data["phone_number"] = phone
+    return booking_data
+
+
+def _release_booking_data(booking_data: Dict[str, Any]) -> None:
+    """Return a booking dict to the pool once nothing references it."""
+    booking_data.clear()
+    if len(_booking_data_pool) < _BOOKING_DATA_POOL_SIZE:
+        _booking_data_pool.append(booking_data)
+
+
+# Bookings being written to the database in the background
+_pending_bookings: Set["asyncio.Future[int]"] = set()
+
+
+def _tentative_booking_id() -> str:
+    """Generate the booking ID shown to the customer and stored with the booking.
+    
+    The random suffix keeps IDs unique for bookings made in the same millisecond.
+    """
+    return f"SB{int(time.time() * 1000)}{uuid.uuid4().hex[:6].upper()}"
+
+
+def schedule_service_booking(booking_data: Dict[str, Any]) -> None:
+    """Persist a service booking in the background.
+
+    Sets a tentative ``booking_id`` on ``booking_data`` so the confirmation can be
+    returned immediately; the same ID is saved with the booking. The write is
+    queued on ``service_booking_batcher`` so bookings arriving together share one
+    transaction. If it fails, the error is logged against the tentative ID.
+    """
+    tentative_id = _tentative_booking_id()
+    booking_data["booking_id"] = tentative_id
+
+    if not service_booking_batcher:
+        return
+
+    pending = service_booking_batcher.put(
+        customer_name=booking_data["customer_name"],
+        phone_number=booking_data["phone_number"],
+        make=booking_data["make"],
+        model=booking_data["model"],
+        year=booking_data["year"],
+        registration_number=booking_data["registration_number"],
+        service_type=booking_data["service_type"],
+        confirmation_id=tentative_id
     )
+    _pending_bookings.add(pending)
+
+    def _on_done(done: "asyncio.Future[int]") -> None:
+        _pending_bookings.discard(done)
+        if done.cancelled():
+            logger.warning("Service booking %s was cancelled before it was saved", tentative_id)
+            return
+        exc = done.exception()
+        if exc is not None:
+            logger.error("Error creating service booking %s", tentative_id, exc_info=exc)
+
+    pending.add_done_callback(_on_done)
+
+
+def _confirm_service_booking(user_id: str, data: Dict[str, Any], customer_name: str, phone: str) -> str:
+    """Create the booking, end the conversation and return the confirmation message."""
+    booking_data = _build_booking_data(data, customer_name, phone)
     
-    return message
+    # Create booking in database without blocking the reply
+    schedule_service_booking(booking_data)
+    
+    # Clear state
+    conversation_manager.clear_state(user_id)
+    
+    confirmation = format_service_booking_confirmation(booking_data)
+    # The scheduled write has already copied the values it needs
+    _release_booking_data(booking_data)
+    return confirmation
+
+
+async def _ask_customer_name(
+    user_id: str,
+    message: str,
+    state: ConversationState,
+    analysis: Dict[str, Any],
+    available_brands: List[str],
+    customer_name: Optional[str],
+    phone: Optional[str],
+) -> str:
+    """Ask for the customer's name."""
+    try:
+        return await generate_service_booking_response(
+            message=message,
+            conversation_context={
+                "step": state.step,
+                "data": state.data
+            },
+            analysis_result=analysis,
+            available_brands=available_brands,
+        )
+    except ResponseGenerationError as e:
+        logger.error("Error generating response: %s", e)
+        return "Please provide your name:"
+
+
+async def _ask_customer_phone(
+    user_id: str,
+    message: str,
+    state: ConversationState,
+    analysis: Dict[str, Any],
+    available_brands: List[str],
+    customer_name: Optional[str],
+    phone: Optional[str],
+) -> str:
+    """Ask for the customer's phone number once the name is known."""
+    try:
+        return await generate_service_booking_response(
+            message=message,
+            conversation_context={
+                "step": state.step,
+                "data": ChainMap({"customer_name": customer_name}, state.data)
+            },
+            analysis_result=analysis,
+            available_brands=available_brands,
+        )
+    except ResponseGenerationError as e:
+        logger.error("Error generating response: %s", e)
+        return f"Nice to meet you, {customer_name}! 👋\n\nCould you please share your phone number?"
+
+
+async def _finalize_service_booking(
+    user_id: str,
+    message: str,
+    state: ConversationState,
+    analysis: Dict[str, Any],
+    available_brands: List[str],
+    customer_name: Optional[str],
+    phone: Optional[str],
+) -> str:
+    """Create the booking once all details are collected and confirm it."""
+    return _confirm_service_booking(user_id, state.data, customer_name, phone)
+
+
+# Customer details handlers, keyed on (has_name, has_phone)
+_CUSTOMER_DETAILS_HANDLERS = {
+    (False, False): _ask_customer_name,
+    (False, True): _ask_customer_name,
+    (True, False): _ask_customer_phone,
+    (True, True): _finalize_service_booking,
+}
+
+
+# Static reply when the service booking can't be started through the LLM
+_BOOK_SERVICE_PROMPT = (
+    "Perfect! Let's book a service for you! 🚗🔧\n\n"
+    "Please provide all required details:\n\n"
+    "*Vehicle Details:*\n"
+    "• Make: (e.g., Hyundai, Maruti, Honda)\n"
+    "• Model: (e.g., i20, Swift, City)\n"
+    "• Year: (e.g., 2020, 2021)\n"
+    "• Registration Number: (e.g., KA01AB1234)\n\n"
+    "Let's start with the car make/brand:"
+)
 
 
 async def handle_service_booking_flow(
@@ -211,7 +486,7 @@ async def handle_service_booking_flow(
             conversation_manager.update_state(user_id, step="collecting_vehicle_details")
             conversation_manager.update_data(user_id, service="Vehicle Servicing & Repairs")
             try:
-                analysis = await analyze_service_booking_message(
+                analysis = await _analyze_with_cache(
                     message=message,
                     conversation_context={"step": "collecting_vehicle_details", "data": {}},
                     available_brands=available_brands,
@@ -223,30 +498,12 @@ async def handle_service_booking_flow(
                     available_brands=available_brands,
                 )
                 return response
-            except ServiceBookingAnalysisError as e:
-                print(f"Analysis error: {e}")
-                return (
-                    "Perfect! Let's book a service for you! 🚗🔧\n\n"
-                    "Please provide all required details:\n\n"
-                    "*Vehicle Details:*\n"
-                    "• Make: (e.g., Hyundai, Maruti, Honda)\n"
-                    "• Model: (e.g., i20, Swift, City)\n"
-                    "• Year: (e.g., 2020, 2021)\n"
-                    "• Registration Number: (e.g., KA01AB1234)\n\n"
-                    "Let's start with the car make/brand:"
-                )
+            except (ServiceBookingAnalysisError, ResponseGenerationError) as e:
+                logger.error("Error starting service booking: %s", e)
+                return _BOOK_SERVICE_PROMPT
             except Exception as e:
-                print(f"Error generating response: {e}")
-                return (
-                    "Perfect! Let's book a service for you! 🚗🔧\n\n"
-                    "Please provide all required details:\n\n"
-                    "*Vehicle Details:*\n"
-                    "• Make: (e.g., Hyundai, Maruti, Honda)\n"
-                    "• Model: (e.g., i20, Swift, City)\n"
-                    "• Year: (e.g., 2020, 2021)\n"
-                    "• Registration Number: (e.g., KA01AB1234)\n\n"
-                    "Let's start with the car make/brand:"
-                )
+                logger.error("Unexpected error starting service booking: %s", e, exc_info=True)
+                return _BOOK_SERVICE_PROMPT
         
         elif message_lower in ["2", "browse", "browse cars", "used cars"]:
             # Route to browse cars
@@ -282,7 +539,7 @@ async def handle_service_booking_flow(
         else:
             # Try intelligent analysis
             try:
-                analysis = await analyze_service_booking_message(
+                analysis = await _analyze_with_cache(
                     message=message,
                     conversation_context={
                         "step": state.step,
@@ -301,17 +558,17 @@ async def handle_service_booking_flow(
                     available_brands=available_brands,
                 )
                 return response
-            except ServiceBookingAnalysisError as e:
-                print(f"Analysis error in showing_services: {e}")
+            except (ServiceBookingAnalysisError, ResponseGenerationError) as e:
+                logger.error("Error in showing_services: %s", e)
                 return format_services_list()
             except Exception as e:
-                print(f"Error generating response: {e}")
+                logger.error("Unexpected error in showing_services: %s", e, exc_info=True)
                 return format_services_list()
     
     elif state.step == "collecting_vehicle_details":
         # Collecting vehicle details: Make, Model, Year, Registration
         try:
-            analysis = await analyze_service_booking_message(
+            analysis = await _analyze_with_cache(
                 message=message,
                 conversation_context={
                     "step": state.step,
@@ -339,8 +596,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                 return format_services_list()
             
             # Fallback extraction
@@ -373,8 +630,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     brands_list = ", ".join(available_brands[:5]) if available_brands else ""
                     return f"Which brand/make is your car? (e.g., {brands_list})" if brands_list else "Which brand/make is your car?"
             
@@ -390,8 +647,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return f"What's the model of your {make} car? (e.g., i20, Creta, Venue)"
             
             elif not year:
@@ -406,8 +663,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return f"What year is your {make} {car_model or state.data.get('model', 'car')}? (e.g., 2020, 2021)"
             
             elif not registration:
@@ -422,8 +679,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return f"What's the registration number of your car? (e.g., KA01AB1234)"
             
             else:
@@ -440,8 +697,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return (
                         f"Perfect! I have all the vehicle details:\n"
                         f"• Make: {make}\n"
@@ -458,7 +715,7 @@ async def handle_service_booking_flow(
                     )
         
         except ServiceBookingAnalysisError as e:
-            print(f"Analysis error in collecting_vehicle_details: {e}")
+            logger.error("Analysis error in collecting_vehicle_details: %s", e)
             # Fallback extraction
             make = await extract_brand_from_message(message) or state.data.get("make")
             car_model = state.data.get("model")
@@ -487,7 +744,7 @@ async def handle_service_booking_flow(
                     f"Please select (1-5):"
                 )
         except Exception as e:
-            print(f"Error in collecting_vehicle_details step: {e}")
+            logger.error("Error in collecting_vehicle_details step: %s", e, exc_info=True)
             # Fallback extraction
             make = await extract_brand_from_message(message) or state.data.get("make")
             car_model = state.data.get("model")
@@ -519,7 +776,7 @@ async def handle_service_booking_flow(
     elif state.step == "collecting_service_type":
         # Collecting service type
         try:
-            analysis = await analyze_service_booking_message(
+            analysis = await _analyze_with_cache(
                 message=message,
                 conversation_context={
                     "step": state.step,
@@ -558,8 +815,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                 return "No problem! Let's update the vehicle details. What would you like to change?"
             
             if service_type:
@@ -572,14 +829,14 @@ async def handle_service_booking_flow(
                         message=message,
                         conversation_context={
                             "step": "collecting_customer_details",
-                            "data": {**state.data, "service_type": service_type}
+                            "data": ChainMap({"service_type": service_type}, state.data)
                         },
                         analysis_result=analysis,
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return (
                         f"Excellent! Service type: *{service_type}* ✅\n\n"
                         f"Now I need your contact details:\n\n"
@@ -598,8 +855,8 @@ async def handle_service_booking_flow(
                         available_brands=available_brands,
                     )
                     return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
+                except ResponseGenerationError as e:
+                    logger.error("Error generating response: %s", e)
                     return (
                         f"Please select a service type:\n\n"
                         f"1️⃣ Regular Service\n"
@@ -611,7 +868,7 @@ async def handle_service_booking_flow(
                     )
         
         except ServiceBookingAnalysisError as e:
-            print(f"Analysis error in collecting_service_type: {e}")
+            logger.error("Analysis error in collecting_service_type: %s", e)
             message_lower = message.lower().strip()
             if message_lower in ["1", "regular"]:
                 service_type = "Regular Service"
@@ -633,7 +890,7 @@ async def handle_service_booking_flow(
                 f"Now I need your contact details. Please provide your name:"
             )
         except Exception as e:
-            print(f"Error in collecting_service_type step: {e}")
+            logger.error("Error in collecting_service_type step: %s", e, exc_info=True)
             message_lower = message.lower().strip()
             if message_lower in ["1", "regular"]:
                 service_type = "Regular Service"
@@ -658,7 +915,7 @@ async def handle_service_booking_flow(
     elif state.step == "collecting_customer_details":
         # Collecting customer name and phone
         try:
-            analysis = await analyze_service_booking_message(
+            analysis = await _analyze_with_cache(
                 message=message,
                 conversation_context={
                     "step": state.step,
@@ -672,16 +929,15 @@ async def handle_service_booking_flow(
             phone = state.data.get("phone_number")
             
             # Extract phone number if present
-            phone_digits = re.sub(r'\D', '', message)
-            if len(phone_digits) >= 10 and not phone:
-                phone = phone_digits[:10] if len(phone_digits) == 10 else phone_digits[-10:]
+            if not phone:
+                phone = extract_phone_number(message)
             
             # If no name yet, assume this message is the name
             if not customer_name:
                 # Remove phone digits from name
                 name = message
                 if phone:
-                    name = re.sub(r'\d+', '', name).strip()
+                    name = _DIGITS_PATTERN.sub('', name).strip()
                 if len(name) >= 2:
                     customer_name = name
                     conversation_manager.update_data(user_id, customer_name=customer_name)
@@ -689,79 +945,12 @@ async def handle_service_booking_flow(
             if phone:
                 conversation_manager.update_data(user_id, phone_number=phone)
             
-            # Check what's missing
-            if not customer_name:
-                try:
-                    response = await generate_service_booking_response(
-                        message=message,
-                        conversation_context={
-                            "step": state.step,
-                            "data": state.data
-                        },
-                        analysis_result=analysis,
-                        available_brands=available_brands,
-                    )
-                    return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
-                    return "Please provide your name:"
-            
-            elif not phone:
-                try:
-                    response = await generate_service_booking_response(
-                        message=message,
-                        conversation_context={
-                            "step": state.step,
-                            "data": {**state.data, "customer_name": customer_name}
-                        },
-                        analysis_result=analysis,
-                        available_brands=available_brands,
-                    )
-                    return response
-                except Exception as e:
-                    print(f"Error generating response: {e}")
-                    return f"Nice to meet you, {customer_name}! 👋\n\nCould you please share your phone number?"
-            
-            else:
-                # All details collected, create booking
-                booking_data = {
-                    "service": "Vehicle Servicing & Repairs",  # Default service
-                    "make": state.data.get("make"),
-                    "model": state.data.get("model"),
-                    "year": state.data.get("year"),
-                    "registration_number": state.data.get("registration_number"),
-                    "service_type": state.data.get("service_type"),
-                    "customer_name": customer_name,
-                    "phone_number": phone,
-                }
-                
-                # Create booking in database
-                try:
-                    if car_db:
-                        booking_id = await car_db.create_service_booking(
-                            customer_name=customer_name,
-                            phone_number=phone,
-                            make=booking_data["make"],
-                            model=booking_data["model"],
-                            year=booking_data["year"],
-                            registration_number=booking_data["registration_number"],
-                            service_type=booking_data["service_type"]
-                        )
-                        booking_data["booking_id"] = booking_id
-                    else:
-                        booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                except Exception as e:
-                    print(f"Error creating service booking: {e}")
-                    booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    return f"I encountered an error booking your service. Please try again or contact us directly. Error: {str(e)}"
-                
-                # Clear state
-                conversation_manager.clear_state(user_id)
-                
-                return format_service_booking_confirmation(booking_data)
+            # Continue with whichever detail is still missing
+            handler = _CUSTOMER_DETAILS_HANDLERS[(bool(customer_name), bool(phone))]
+            return await handler(user_id, message, state, analysis, available_brands, customer_name, phone)
         
         except ServiceBookingAnalysisError as e:
-            print(f"Analysis error in collecting_customer_details: {e}")
+            logger.error("Analysis error in collecting_customer_details: %s", e)
             # Fallback
             customer_name = state.data.get("customer_name")
             phone = state.data.get("phone_number")
@@ -774,49 +963,17 @@ async def handle_service_booking_flow(
                     return "Please provide a valid name (at least 2 characters)."
             
             if not phone:
-                phone_digits = re.sub(r'\D', '', message)
-                if len(phone_digits) >= 10:
-                    phone = phone_digits[:10] if len(phone_digits) == 10 else phone_digits[-10:]
+                phone = extract_phone_number(message)
+                if phone:
                     conversation_manager.update_data(user_id, phone_number=phone)
                 else:
                     return f"Nice to meet you, {customer_name}! Please share your 10-digit phone number."
             
             if customer_name and phone:
                 # Create booking
-                booking_data = {
-                    "service": "Vehicle Servicing & Repairs",
-                    "make": state.data.get("make"),
-                    "model": state.data.get("model"),
-                    "year": state.data.get("year"),
-                    "registration_number": state.data.get("registration_number"),
-                    "service_type": state.data.get("service_type"),
-                    "customer_name": customer_name,
-                    "phone_number": phone,
-                }
-                
-                try:
-                    if car_db:
-                        booking_id = await car_db.create_service_booking(
-                            customer_name=customer_name,
-                            phone_number=phone,
-                            make=booking_data["make"],
-                            model=booking_data["model"],
-                            year=booking_data["year"],
-                            registration_number=booking_data["registration_number"],
-                            service_type=booking_data["service_type"]
-                        )
-                        booking_data["booking_id"] = booking_id
-                    else:
-                        booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                except Exception as e:
-                    print(f"Error creating service booking: {e}")
-                    booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    return f"I encountered an error booking your service. Please try again or contact us directly. Error: {str(e)}"
-                
-                conversation_manager.clear_state(user_id)
-                return format_service_booking_confirmation(booking_data)
+                return _confirm_service_booking(user_id, state.data, customer_name, phone)
         except Exception as e:
-            print(f"Error in collecting_customer_details step: {e}")
+            logger.error("Error in collecting_customer_details step: %s", e, exc_info=True)
             # Fallback
             customer_name = state.data.get("customer_name")
             phone = state.data.get("phone_number")
@@ -829,47 +986,15 @@ async def handle_service_booking_flow(
                     return "Please provide a valid name (at least 2 characters)."
             
             if not phone:
-                phone_digits = re.sub(r'\D', '', message)
-                if len(phone_digits) >= 10:
-                    phone = phone_digits[:10] if len(phone_digits) == 10 else phone_digits[-10:]
+                phone = extract_phone_number(message)
+                if phone:
                     conversation_manager.update_data(user_id, phone_number=phone)
                 else:
                     return f"Nice to meet you, {customer_name}! Please share your 10-digit phone number."
             
             if customer_name and phone:
                 # Create booking
-                booking_data = {
-                    "service": "Vehicle Servicing & Repairs",
-                    "make": state.data.get("make"),
-                    "model": state.data.get("model"),
-                    "year": state.data.get("year"),
-                    "registration_number": state.data.get("registration_number"),
-                    "service_type": state.data.get("service_type"),
-                    "customer_name": customer_name,
-                    "phone_number": phone,
-                }
-                
-                try:
-                    if car_db:
-                        booking_id = await car_db.create_service_booking(
-                            customer_name=customer_name,
-                            phone_number=phone,
-                            make=booking_data["make"],
-                            model=booking_data["model"],
-                            year=booking_data["year"],
-                            registration_number=booking_data["registration_number"],
-                            service_type=booking_data["service_type"]
-                        )
-                        booking_data["booking_id"] = booking_id
-                    else:
-                        booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                except Exception as e:
-                    print(f"Error creating service booking: {e}")
-                    booking_data["booking_id"] = f"SB{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    return f"I encountered an error booking your service. Please try again or contact us directly. Error: {str(e)}"
-                
-                conversation_manager.clear_state(user_id)
-                return format_service_booking_confirmation(booking_data)
+                return _confirm_service_booking(user_id, state.data, customer_name, phone)
     
     return "I'm not sure how to help with that. Could you please rephrase?"
 
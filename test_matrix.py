@@ -4,16 +4,21 @@ Tests 100 complete conversations per flow and verifies bot responses.
 """
 
 import asyncio
+import os
 import random
+import re
+import sys
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime
 from conversation_state import conversation_manager, ConversationState
-from browse_car_flow import handle_browse_car_flow
-from car_valuation_flow import handle_car_valuation_flow
-from emi_flow import handle_emi_flow
-from service_booking_flow import handle_service_booking_flow
-from database import car_db
+from database import car_db, service_booking_batcher
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Test data generators
 BRANDS = ["Hyundai", "Maruti", "Tata", "Honda", "Toyota", "Mahindra", "Ford", "Nissan", "Skoda", "Renault"]
@@ -23,40 +28,128 @@ CONDITIONS = ["Excellent", "Very Good", "Good", "Average", "Fair", "Poor"]
 SERVICE_TYPES = ["Regular Service", "Major Service", "Accident Repair", "Insurance Claim", "Other"]
 NAMES = ["Raj", "Priya", "Amit", "Sneha", "Rahul", "Anjali", "Vikram", "Kavya", "Arjun", "Meera"]
 PHONE_PREFIXES = ["91", "91", "91", "91", "91"]  # Indian numbers
+MODELS = ("i20", "Creta", "Swift", "City", "Innova")
+VALUATION_MODELS = MODELS + ("Nexon", "EcoSport", "Magnite", "Rapid", "Duster")
+TENURES = (12, 24, 36, 48, 60, 72)
+REG_SERIES = ("AB", "CD", "EF", "GH")
+
+# User message variants, built once rather than per conversation step
+BROWSE_OPENERS = (
+    "I want to buy a car",
+    "browse cars",
+    "looking for a car",
+    "show me cars",
+    "I need a car",
+)
+VALUATION_OPENERS = (
+    "value my car",
+    "how much is my car worth",
+    "car valuation",
+    "I want to sell my car",
+    "what's the price of my car",
+)
+EMI_OPENERS = (
+    "calculate EMI",
+    "loan options",
+    "monthly payment",
+    "I need EMI calculation",
+    "finance options",
+)
+SERVICE_OPENERS = (
+    "book service",
+    "service booking",
+    "book a service",
+    "I need servicing",
+    "car service",
+)
+BRAND_PHRASE_FMTS = ("{brand}", "I want {brand}", "Looking for {brand}", "{brand} please")
+BUDGET_FMTS = ("{lo}-{hi} lakh", "{lo} to {hi} lakh", "under {hi} lakh", "{lo} lakh")
+CAR_TYPE_FMTS = ("{car_type}", "I want {car_type}", "{car_type} please")
+DL_REPLIES = ("yes", "Yes", "I have", "y")
+LOCATION_REPLIES = ("1", "2", "showroom", "home")
+VALUATION_BRAND_FMTS = ("{brand}", "{brand} car", "It's {brand}")
+VALUATION_MODEL_FMTS = ("{model}", "{brand} {model}", "Model is {model}")
+YEAR_FMTS = ("{year}", "Year {year}", "{year} model")
+FUEL_FMTS = ("{fuel}", "{fuel} car", "It's {fuel}")
+CONDITION_FMTS = ("{condition}", "{condition} condition", "It's {condition}")
+DOWN_PAYMENT_FMTS = ("{lakh} lakh", "{rupees}", "{lakh}L")
+
+# A standalone car listing number (1-10)
+_CAR_NUM_RE = re.compile(r"(?<!\d)(?:10|[1-9])(?!\d)")
+# Signs that a selected car's details offer a test drive booking ("1" is
+# unaffected by lowercasing)
+_BOOK_OPTION_KEYWORDS = ("test drive", "book", "1", "option")
 
 
 class TestConversation:
     """Represents a single test conversation."""
     
+    __slots__ = (
+        "flow_name",
+        "conversation_id",
+        "user_id",
+        "start_wall",
+        "_t0",
+        "messages",
+        "errors",
+        "completed",
+        "steps_completed",
+        "total_steps",
+        "verified_count",
+        "_dict_cache",
+        "_dict_cache_key",
+    )
+    
     def __init__(self, flow_name: str, conversation_id: int):
         self.flow_name = flow_name
         self.conversation_id = conversation_id
         self.user_id = f"test_user_{flow_name}_{conversation_id}"
-        self.messages: List[Dict[str, str]] = []
-        self.responses: List[str] = []
+        # Messages carry a millisecond offset from this start time instead of
+        # their own wall-clock timestamp
+        self.start_wall = datetime.now().isoformat()
+        self._t0 = time.monotonic()
+        self.messages: List[Dict[str, Any]] = []
         self.errors: List[str] = []
         self.completed = False
         self.steps_completed = 0
         self.total_steps = 0
+        # Responses are verified as they arrive rather than when reporting
+        self.verified_count = 0
+        self._dict_cache: Optional[Dict[str, Any]] = None
+        self._dict_cache_key: Optional[Tuple[int, bool, int]] = None
         
     def add_message(self, user_message: str, bot_response: str, error: Optional[str] = None):
         """Add a message exchange to the conversation."""
         self.messages.append({
             "user": user_message,
             "bot": bot_response,
-            "timestamp": datetime.now().isoformat()
+            "t_ms": int((time.monotonic() - self._t0) * 1000)
         })
-        self.responses.append(bot_response)
+        if bot_response:
+            is_valid, _ = TestMatrixGenerator.verify_response(
+                bot_response,
+                f"step_{len(self.messages)}",
+                self.flow_name
+            )
+            self.verified_count += is_valid
         if error:
             self.errors.append(error)
         self.steps_completed += 1
         
     def to_dict(self) -> Dict[str, Any]:
-        """Convert conversation to dictionary."""
-        return {
+        """Convert conversation to dictionary, reusing it until the conversation changes."""
+        # completed/total_steps are set directly by the runners, so they are
+        # part of the key alongside the step count that add_message bumps
+        key = (self.steps_completed, self.completed, self.total_steps)
+        if self._dict_cache is not None and self._dict_cache_key == key:
+            return self._dict_cache
+        
+        self._dict_cache_key = key
+        self._dict_cache = {
             "flow_name": self.flow_name,
             "conversation_id": self.conversation_id,
             "user_id": self.user_id,
+            "start_wall": self.start_wall,
             "messages": self.messages,
             "completed": self.completed,
             "steps_completed": self.steps_completed,
@@ -64,6 +157,7 @@ class TestConversation:
             "errors": self.errors,
             "success_rate": (self.steps_completed / self.total_steps * 100) if self.total_steps > 0 else 0
         }
+        return self._dict_cache
 
 
 class TestMatrixGenerator:
@@ -77,385 +171,387 @@ class TestMatrixGenerator:
             "service_booking": []
         }
         self.summary: Dict[str, Any] = {}
+        # Built once by generate_report and reset whenever results change
+        self._cached_report: Optional[Dict[str, Any]] = None
+        # Conversations spend most of their time waiting on the LLM, so run
+        # several per flow at once
+        self.max_concurrency = int(os.getenv("TEST_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+    
+    async def _run_conversations(
+        self,
+        run_conversation: Callable[[int], Awaitable[TestConversation]],
+        count: int,
+    ) -> List[TestConversation]:
+        """Run ``count`` conversations concurrently, at most ``max_concurrency`` at a time."""
+        async def bounded(i: int) -> TestConversation:
+            async with self._semaphore:
+                return await run_conversation(i)
+        
+        conversations = list(await asyncio.gather(*(bounded(i) for i in range(count))))
+        # User ids are unique per conversation, so state can be cleared in one go
+        conversation_manager.clear_states(c.user_id for c in conversations)
+        return conversations
+    
+    # Any one of these substrings (checked against the lowercased response)
+    # marks a flow as complete. Emoji and ₹ are unaffected by lower().
+    _COMPLETION_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+        "browse_car": ("booked", "successfully", "🎉"),
+        "car_valuation": ("valuation", "₹", "rs", "lakh", "worth"),
+        "emi": ("emi", "₹", "rs", "calculated"),
+        "service_booking": ("confirmed", "✅"),
+    }
+    # ...as does any group whose substrings all appear together
+    _COMPLETION_KEYWORD_GROUPS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+        "browse_car": (("booking id", "test drive"),),
+        "car_valuation": (("estimated", "price"),),
+        "emi": (("monthly", "payment"),),
+        "service_booking": (("booking", "id"),),
+    }
     
     def check_completion(self, response: str, flow_name: str) -> bool:
         """Check if a response indicates flow completion."""
         response_lower = response.lower()
-        response_upper = response.upper()
-        
-        if flow_name == "browse_car":
-            return ("booked" in response_lower or 
-                    "successfully" in response_lower or
-                    "test drive booked" in response_lower or
-                    "🎉" in response or
-                    ("booking id" in response_lower and "test drive" in response_lower))
-        
-        elif flow_name == "car_valuation":
-            return ("valuation" in response_lower or 
-                    "₹" in response or 
-                    "rs" in response_lower or
-                    "lakh" in response_lower or
-                    ("estimated" in response_lower and "price" in response_lower) or
-                    "worth" in response_lower)
-        
-        elif flow_name == "emi":
-            return ("EMI" in response_upper or 
-                    "₹" in response or 
-                    "rs" in response_lower or
-                    ("monthly" in response_lower and ("payment" in response_lower or "emi" in response_lower)) or
-                    "calculated" in response_lower)
-        
-        elif flow_name == "service_booking":
-            return ("confirmed" in response_lower or 
-                    ("booking" in response_lower and ("id" in response_lower or "confirmed" in response_lower)) or
-                    "service booking confirmed" in response_lower or
-                    "✅" in response)
-        
-        return False
+        if any(k in response_lower for k in self._COMPLETION_KEYWORDS.get(flow_name, ())):
+            return True
+        return any(
+            all(k in response_lower for k in group)
+            for group in self._COMPLETION_KEYWORD_GROUPS.get(flow_name, ())
+        )
         
     async def generate_browse_car_conversations(self, count: int = 100) -> List[TestConversation]:
         """Generate 100 complete browse car conversations."""
-        conversations = []
+        # Imported here so loading test_matrix does not pull in every flow
+        from browse_car_flow import handle_browse_car_flow
         
-        for i in range(count):
-            conv = TestConversation("browse_car", i + 1)
-            try:
-                # Step 1: Initial message
-                user_msg = random.choice([
-                    "I want to buy a car",
-                    "browse cars",
-                    "looking for a car",
-                    "show me cars",
-                    "I need a car"
-                ])
-                response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for early completion
-                if self.check_completion(response, "browse_car"):
-                    conv.completed = True
-                
-                # Step 2: Provide brand
-                brand = random.choice(BRANDS)
-                user_msg = random.choice([
-                    brand,
-                    f"I want {brand}",
-                    f"Looking for {brand}",
-                    f"{brand} please"
-                ])
-                response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 3: Provide budget
-                budget_min = random.randint(3, 8)
-                budget_max = budget_min + random.randint(2, 5)
-                user_msg = random.choice([
-                    f"{budget_min}-{budget_max} lakh",
-                    f"{budget_min} to {budget_max} lakh",
-                    f"under {budget_max} lakh",
-                    f"{budget_min} lakh"
-                ])
-                response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 4: Provide car type
-                car_type = random.choice(CAR_TYPES)
-                user_msg = random.choice([
-                    car_type,
-                    f"I want {car_type}",
-                    f"{car_type} please"
-                ])
-                response = await handle_browse_car_flow(conv.user_id, user_msg, None)
+        # Sample each conversation's categorical picks for the whole batch up front
+        brands = random.choices(BRANDS, k=count)
+        car_types = random.choices(CAR_TYPES, k=count)
+        names = random.choices(NAMES, k=count)
+        return await self._run_conversations(
+            lambda i: self._run_browse_car_conversation(
+                handle_browse_car_flow, i, brands[i], car_types[i], names[i]
+            ),
+            count,
+        )
+    
+    async def _run_browse_car_conversation(
+        self,
+        handle: Callable[..., Awaitable[str]],
+        i: int,
+        brand: str,
+        car_type: str,
+        name: str,
+    ) -> TestConversation:
+        """Run a single browse car conversation."""
+        choice, randint = random.choice, random.randint
+        conv = TestConversation("browse_car", i + 1)
+        try:
+            # Step 1: Initial message
+            user_msg = choice(BROWSE_OPENERS)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Check for early completion
+            if self.check_completion(response, "browse_car"):
+                conv.completed = True
+            
+            # Step 2: Provide brand
+            user_msg = choice(BRAND_PHRASE_FMTS).format(brand=brand)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 3: Provide budget
+            budget_min = randint(3, 8)
+            budget_max = budget_min + randint(2, 5)
+            user_msg = choice(BUDGET_FMTS).format(lo=budget_min, hi=budget_max)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 4: Provide car type
+            user_msg = choice(CAR_TYPE_FMTS).format(car_type=car_type)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 5: Select a car (if cars are shown)
+            # More flexible check for car listing
+            rl = response.lower()
+            if "found" in rl or ("car" in rl and (
+                    "select" in rl or "here are" in rl or _CAR_NUM_RE.search(response))):
+                # Try to select car number 1
+                user_msg = "1"
+                response = await handle(conv.user_id, user_msg, None)
                 conv.add_message(user_msg, response)
                 
-                # Step 5: Select a car (if cars are shown)
-                # More flexible check for car listing
-                response_lower = response.lower()
-                has_car_numbers = any(str(n) in response for n in range(1, 11))
-                if ("found" in response_lower or 
-                    ("car" in response_lower and has_car_numbers) or
-                    "select" in response_lower and "car" in response_lower or
-                    "here are" in response_lower and "car" in response_lower):
-                    # Try to select car number 1
+                # Step 6: Book test drive
+                rl = response.lower()
+                if any(k in rl for k in _BOOK_OPTION_KEYWORDS):
                     user_msg = "1"
-                    response = await handle_browse_car_flow(conv.user_id, user_msg, None)
+                    response = await handle(conv.user_id, user_msg, None)
                     conv.add_message(user_msg, response)
                     
-                    # Step 6: Book test drive
-                    response_lower = response.lower()
-                    if ("test drive" in response_lower or 
-                        "book" in response_lower or
-                        "1" in response or
-                        "option" in response_lower):
-                        user_msg = "1"
-                        response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                        conv.add_message(user_msg, response)
-                        
-                        # Step 7: Provide name
-                        name = random.choice(NAMES)
-                        user_msg = name
-                        response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                        conv.add_message(user_msg, response)
-                        
-                        # Step 8: Provide phone
-                        phone = f"{random.choice(PHONE_PREFIXES)}{random.randint(1000000000, 9999999999)}"
-                        user_msg = phone
-                        response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                        conv.add_message(user_msg, response)
-                        
-                        # Step 9: Provide DL info
-                        user_msg = random.choice(["yes", "Yes", "I have", "y"])
-                        response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                        conv.add_message(user_msg, response)
-                        
-                        # Step 10: Provide location
-                        user_msg = random.choice(["1", "2", "showroom", "home"])
-                        response = await handle_browse_car_flow(conv.user_id, user_msg, None)
-                        conv.add_message(user_msg, response)
-                        
-                        # Check for completion
-                        if self.check_completion(response, "browse_car"):
-                            conv.completed = True
-                
-                conv.total_steps = conv.steps_completed
-                conversations.append(conv)
-                
-            except Exception as e:
-                conv.add_message("", "", str(e))
-                conversations.append(conv)
-            
-            # Clear state for next conversation
-            conversation_manager.clear_state(conv.user_id)
+                    # Step 7: Provide name
+                    user_msg = name
+                    response = await handle(conv.user_id, user_msg, None)
+                    conv.add_message(user_msg, response)
+                    
+                    # Step 8: Provide phone
+                    phone = f"{choice(PHONE_PREFIXES)}{randint(1000000000, 9999999999)}"
+                    user_msg = phone
+                    response = await handle(conv.user_id, user_msg, None)
+                    conv.add_message(user_msg, response)
+                    
+                    # Step 9: Provide DL info
+                    user_msg = choice(DL_REPLIES)
+                    response = await handle(conv.user_id, user_msg, None)
+                    conv.add_message(user_msg, response)
+                    
+                    # Step 10: Provide location
+                    user_msg = choice(LOCATION_REPLIES)
+                    response = await handle(conv.user_id, user_msg, None)
+                    conv.add_message(user_msg, response)
+                    
+                    # Check for completion
+                    if self.check_completion(response, "browse_car"):
+                        conv.completed = True
             
-        return conversations
+            conv.total_steps = conv.steps_completed
+        except Exception as e:
+            conv.add_message("", "", str(e))
+        return conv
     
     async def generate_car_valuation_conversations(self, count: int = 100) -> List[TestConversation]:
         """Generate 100 complete car valuation conversations."""
-        conversations = []
+        from car_valuation_flow import handle_car_valuation_flow
         
-        for i in range(count):
-            conv = TestConversation("car_valuation", i + 1)
-            try:
-                # Step 1: Initial message
-                user_msg = random.choice([
-                    "value my car",
-                    "how much is my car worth",
-                    "car valuation",
-                    "I want to sell my car",
-                    "what's the price of my car"
-                ])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for early completion
-                if self.check_completion(response, "car_valuation"):
-                    conv.completed = True
-                
-                # Step 2: Provide brand
-                brand = random.choice(BRANDS)
-                user_msg = random.choice([brand, f"{brand} car", f"It's {brand}"])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 3: Provide model
-                model = random.choice(["i20", "Creta", "Swift", "City", "Innova", "Nexon", "EcoSport", "Magnite", "Rapid", "Duster"])
-                user_msg = random.choice([model, f"{brand} {model}", f"Model is {model}"])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 4: Provide year
-                year = random.randint(2015, 2023)
-                user_msg = random.choice([str(year), f"Year {year}", f"{year} model"])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 5: Provide fuel type
-                fuel_type = random.choice(FUEL_TYPES)
-                user_msg = random.choice([fuel_type, f"{fuel_type} car", f"It's {fuel_type}"])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 6: Provide condition
-                condition = random.choice(CONDITIONS)
-                user_msg = random.choice([condition.lower(), f"{condition.lower()} condition", f"It's {condition.lower()}"])
-                response = await handle_car_valuation_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for completion
-                if self.check_completion(response, "car_valuation"):
-                    conv.completed = True
-                
-                conv.total_steps = conv.steps_completed
-                conversations.append(conv)
-                
-            except Exception as e:
-                conv.add_message("", "", str(e))
-                conversations.append(conv)
+        brands = random.choices(BRANDS, k=count)
+        return await self._run_conversations(
+            lambda i: self._run_car_valuation_conversation(handle_car_valuation_flow, i, brands[i]),
+            count,
+        )
+    
+    async def _run_car_valuation_conversation(
+        self, handle: Callable[..., Awaitable[str]], i: int, brand: str
+    ) -> TestConversation:
+        """Run a single car valuation conversation."""
+        choice, randint = random.choice, random.randint
+        conv = TestConversation("car_valuation", i + 1)
+        try:
+            # Step 1: Initial message
+            user_msg = choice(VALUATION_OPENERS)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
             
-            conversation_manager.clear_state(conv.user_id)
+            # Check for early completion
+            if self.check_completion(response, "car_valuation"):
+                conv.completed = True
             
-        return conversations
+            # Step 2: Provide brand
+            user_msg = choice(VALUATION_BRAND_FMTS).format(brand=brand)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 3: Provide model
+            model = choice(VALUATION_MODELS)
+            user_msg = choice(VALUATION_MODEL_FMTS).format(brand=brand, model=model)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 4: Provide year
+            year = randint(2015, 2023)
+            user_msg = choice(YEAR_FMTS).format(year=year)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 5: Provide fuel type
+            fuel_type = choice(FUEL_TYPES)
+            user_msg = choice(FUEL_FMTS).format(fuel=fuel_type)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 6: Provide condition
+            condition = choice(CONDITIONS)
+            user_msg = choice(CONDITION_FMTS).format(condition=condition.lower())
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Check for completion
+            if self.check_completion(response, "car_valuation"):
+                conv.completed = True
+            
+            conv.total_steps = conv.steps_completed
+        except Exception as e:
+            conv.add_message("", "", str(e))
+        return conv
     
     async def generate_emi_conversations(self, count: int = 100) -> List[TestConversation]:
         """Generate 100 complete EMI conversations."""
-        conversations = []
+        from emi_flow import handle_emi_flow
         
-        for i in range(count):
-            conv = TestConversation("emi", i + 1)
-            try:
-                # Step 1: Initial message
-                user_msg = random.choice([
-                    "calculate EMI",
-                    "loan options",
-                    "monthly payment",
-                    "I need EMI calculation",
-                    "finance options"
-                ])
-                response = await handle_emi_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for early completion
-                if self.check_completion(response, "emi"):
-                    conv.completed = True
-                
-                # Step 2: For EMI, we need a car first
-                # Simulate selecting a car by providing car details or browsing
-                # Since EMI flow requires a selected car, we'll create a mock car in state
-                # Or we can browse first - let's try browsing approach
-                # Actually, let's set a selected car in the state directly for testing
-                brand = random.choice(BRANDS)
-                model = random.choice(["i20", "Creta", "Swift", "City", "Innova"])
-                price = random.randint(500000, 2000000)
-                
-                # Set a selected car in the state for testing
-                # Since EMI flow needs a car, we'll set it directly
-                selected_car = {
-                    "id": i + 1,
-                    "brand": brand,
-                    "model": model,
-                    "price": price
-                }
-                conversation_manager.update_state(conv.user_id, step="down_payment")
-                conversation_manager.update_data(conv.user_id, selected_car=selected_car)
-                
-                # Step 3: Provide down payment
-                down_payment = random.randint(1, 5)  # in lakhs
-                user_msg = random.choice([
-                    f"{down_payment} lakh",
-                    f"{down_payment * 100000}",
-                    f"{down_payment}L"
-                ])
-                response = await handle_emi_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 4: Select tenure
-                tenure = random.choice([12, 24, 36, 48, 60, 72])
-                user_msg = str(tenure)
-                response = await handle_emi_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for completion
-                if self.check_completion(response, "emi"):
-                    conv.completed = True
-                
-                conv.total_steps = conv.steps_completed
-                conversations.append(conv)
-                
-            except Exception as e:
-                conv.add_message("", "", str(e))
-                conversations.append(conv)
+        brands = random.choices(BRANDS, k=count)
+        return await self._run_conversations(
+            lambda i: self._run_emi_conversation(handle_emi_flow, i, brands[i]),
+            count,
+        )
+    
+    async def _run_emi_conversation(
+        self, handle: Callable[..., Awaitable[str]], i: int, brand: str
+    ) -> TestConversation:
+        """Run a single EMI conversation."""
+        choice, randint = random.choice, random.randint
+        conv = TestConversation("emi", i + 1)
+        try:
+            # Step 1: Initial message
+            user_msg = choice(EMI_OPENERS)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
             
-            conversation_manager.clear_state(conv.user_id)
+            # Check for early completion
+            if self.check_completion(response, "emi"):
+                conv.completed = True
             
-        return conversations
+            # Step 2: For EMI, we need a car first
+            # Simulate selecting a car by providing car details or browsing
+            # Since EMI flow requires a selected car, we'll create a mock car in state
+            # Or we can browse first - let's try browsing approach
+            # Actually, let's set a selected car in the state directly for testing
+            model = choice(MODELS)
+            price = randint(500000, 2000000)
+            
+            # Set a selected car in the state for testing
+            # Since EMI flow needs a car, we'll set it directly
+            selected_car = {
+                "id": i + 1,
+                "brand": brand,
+                "model": model,
+                "price": price
+            }
+            conversation_manager.seed_state(conv.user_id, step="down_payment", selected_car=selected_car)
+            
+            # Step 3: Provide down payment
+            down_payment = randint(1, 5)  # in lakhs
+            user_msg = choice(DOWN_PAYMENT_FMTS).format(lakh=down_payment, rupees=down_payment * 100000)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 4: Select tenure
+            tenure = choice(TENURES)
+            user_msg = str(tenure)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Check for completion
+            if self.check_completion(response, "emi"):
+                conv.completed = True
+            
+            conv.total_steps = conv.steps_completed
+        except Exception as e:
+            conv.add_message("", "", str(e))
+        return conv
     
     async def generate_service_booking_conversations(self, count: int = 100) -> List[TestConversation]:
         """Generate 100 complete service booking conversations."""
-        conversations = []
+        from service_booking_flow import handle_service_booking_flow
         
-        for i in range(count):
-            conv = TestConversation("service_booking", i + 1)
-            try:
-                # Step 1: Initial message
-                user_msg = random.choice([
-                    "book service",
-                    "service booking",
-                    "book a service",
-                    "I need servicing",
-                    "car service"
-                ])
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for early completion
-                if self.check_completion(response, "service_booking"):
-                    conv.completed = True
-                
-                # Step 2: Select book service option
-                user_msg = "1"
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 3: Provide make/brand
-                brand = random.choice(BRANDS)
-                user_msg = brand
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 4: Provide model
-                model = random.choice(["i20", "Creta", "Swift", "City", "Innova"])
-                user_msg = model
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 5: Provide year
-                year = random.randint(2015, 2023)
-                user_msg = str(year)
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 6: Provide registration
-                reg = f"KA{random.randint(10, 99)}{random.choice(['AB', 'CD', 'EF', 'GH'])}{random.randint(1000, 9999)}"
-                user_msg = reg
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 7: Select service type
-                service_type_num = random.randint(1, 5)
-                user_msg = str(service_type_num)
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 8: Provide name
-                name = random.choice(NAMES)
-                user_msg = name
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Step 9: Provide phone (10 digits only)
-                phone = f"{random.randint(1000000000, 9999999999)}"
-                user_msg = phone
-                response = await handle_service_booking_flow(conv.user_id, user_msg, None)
-                conv.add_message(user_msg, response)
-                
-                # Check for completion
-                if self.check_completion(response, "service_booking"):
-                    conv.completed = True
-                
-                conv.total_steps = conv.steps_completed
-                conversations.append(conv)
-                
-            except Exception as e:
-                conv.add_message("", "", str(e))
-                conversations.append(conv)
+        randint = random.randint
+        brands = random.choices(BRANDS, k=count)
+        names = random.choices(NAMES, k=count)
+        series = random.choices(REG_SERIES, k=count)
+        registrations = [f"KA{randint(10, 99)}{s}{randint(1000, 9999)}" for s in series]
+        phones = [str(randint(1000000000, 9999999999)) for _ in range(count)]
+        return await self._run_conversations(
+            lambda i: self._run_service_booking_conversation(
+                handle_service_booking_flow, i, brands[i], names[i], registrations[i], phones[i]
+            ),
+            count,
+        )
+    
+    async def _run_service_booking_conversation(
+        self,
+        handle: Callable[..., Awaitable[str]],
+        i: int,
+        brand: str,
+        name: str,
+        reg: str,
+        phone: str,
+    ) -> TestConversation:
+        """Run a single service booking conversation."""
+        choice, randint = random.choice, random.randint
+        conv = TestConversation("service_booking", i + 1)
+        try:
+            # Step 1: Initial message
+            user_msg = choice(SERVICE_OPENERS)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
             
-            conversation_manager.clear_state(conv.user_id)
+            # Check for early completion
+            if self.check_completion(response, "service_booking"):
+                conv.completed = True
             
-        return conversations
+            # Step 2: Select book service option
+            user_msg = "1"
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 3: Provide make/brand
+            user_msg = brand
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 4: Provide model
+            model = choice(MODELS)
+            user_msg = model
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 5: Provide year
+            year = randint(2015, 2023)
+            user_msg = str(year)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 6: Provide registration
+            user_msg = reg
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 7: Select service type
+            service_type_num = randint(1, 5)
+            user_msg = str(service_type_num)
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 8: Provide name
+            user_msg = name
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Step 9: Provide phone (10 digits only)
+            user_msg = phone
+            response = await handle(conv.user_id, user_msg, None)
+            conv.add_message(user_msg, response)
+            
+            # Check for completion
+            if self.check_completion(response, "service_booking"):
+                conv.completed = True
+            
+            conv.total_steps = conv.steps_completed
+        except Exception as e:
+            conv.add_message("", "", str(e))
+        return conv
+    
+    # Keywords that mark a response as appropriate for a flow
+    _VERIFY_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+        "browse_car": ("test drive", "name"),
+        "car_valuation": ("brand", "model", "year", "valuation"),
+        "emi": ("emi", "down payment", "tenure", "loan"),
+        "service_booking": ("service", "make", "model", "name"),
+    }
     
-    def verify_response(self, response: str, step: str, flow_name: str) -> Tuple[bool, str]:
+    @classmethod
+    def verify_response(cls, response: str, step: str, flow_name: str) -> Tuple[bool, str]:
         """Verify if bot response is appropriate for the step."""
-        if not response or len(response.strip()) == 0:
+        if not response or not response.strip():
             return False, "Empty response"
         
         response_lower = response.lower()
@@ -465,27 +561,8 @@ class TestMatrixGenerator:
             return False, "Error in response"
         
         # Flow-specific checks
-        if flow_name == "browse_car":
-            if step == "collecting_criteria":
-                if "brand" in response_lower or "budget" in response_lower or "type" in response_lower:
-                    return True, "Appropriate"
-            elif step == "showing_cars":
-                if "car" in response_lower or "found" in response_lower or "select" in response_lower:
-                    return True, "Appropriate"
-            elif "test drive" in response_lower or "name" in response_lower:
-                return True, "Appropriate"
-        
-        elif flow_name == "car_valuation":
-            if "brand" in response_lower or "model" in response_lower or "year" in response_lower or "valuation" in response_lower:
-                return True, "Appropriate"
-        
-        elif flow_name == "emi":
-            if "emi" in response_lower or "down payment" in response_lower or "tenure" in response_lower or "loan" in response_lower:
-                return True, "Appropriate"
-        
-        elif flow_name == "service_booking":
-            if "service" in response_lower or "make" in response_lower or "model" in response_lower or "name" in response_lower:
-                return True, "Appropriate"
+        if any(k in response_lower for k in cls._VERIFY_KEYWORDS.get(flow_name, ())):
+            return True, "Appropriate"
         
         # Default: if response is not empty and not an error, consider it valid
         if len(response) > 10:
@@ -493,6 +570,23 @@ class TestMatrixGenerator:
         
         return False, "Response seems inappropriate"
     
+    @staticmethod
+    def _format_flow_stats(flow_name: str, conversations: List[TestConversation]) -> str:
+        """Format completion, step and error totals for one flow."""
+        # Calculate statistics in a single pass
+        completed = total_steps = total_errors = 0
+        for c in conversations:
+            completed += c.completed
+            total_steps += c.steps_completed
+            total_errors += len(c.errors)
+        
+        return (
+            f"\n📊 {flow_name}\n"
+            f"  ✓ Completed: {completed}/{len(conversations)}\n"
+            f"  ✓ Total steps: {total_steps}\n"
+            f"  ✓ Errors: {total_errors}\n"
+        )
+    
     async def run_all_tests(self):
         """Run all test conversations."""
         print("Starting test matrix generation...")
@@ -514,26 +608,27 @@ class TestMatrixGenerator:
             ("service_booking", self.generate_service_booking_conversations),
         ]
         
-        for flow_name, generator_func in flows:
-            print(f"\n📊 Testing {flow_name} flow (100 conversations)...")
-            print(f"  This may take several minutes...")
-            conversations = await generator_func(100)
+        print(f"\n📊 Testing {len(flows)} flows concurrently (100 conversations each)...")
+        # Flush before the long wait so progress shows up even when piped
+        print(f"  This may take several minutes...", flush=True)
+        results = await asyncio.gather(*(generator_func(100) for _, generator_func in flows))
+        
+        # Collect the per-flow stats and write them out in one go
+        parts = []
+        for (flow_name, _), conversations in zip(flows, results):
             self.results[flow_name] = conversations
-            
-            # Calculate statistics
-            completed = sum(1 for c in conversations if c.completed)
-            total_steps = sum(c.steps_completed for c in conversations)
-            total_errors = sum(len(c.errors) for c in conversations)
-            
-            print(f"  ✓ Completed: {completed}/100")
-            print(f"  ✓ Total steps: {total_steps}")
-            print(f"  ✓ Errors: {total_errors}")
+            parts.append(self._format_flow_stats(flow_name, conversations))
+        self._cached_report = None
         
-        print("\n" + "=" * 60)
-        print("✓ All tests completed!")
+        parts.append("\n" + "=" * 60 + "\n✓ All tests completed!\n")
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
         
     def generate_report(self) -> Dict[str, Any]:
         """Generate comprehensive test report."""
+        if self._cached_report is not None:
+            return self._cached_report
+        
         report = {
             "test_date": datetime.now().isoformat(),
             "summary": {},
@@ -541,23 +636,14 @@ class TestMatrixGenerator:
         }
         
         for flow_name, conversations in self.results.items():
-            completed = sum(1 for c in conversations if c.completed)
-            total_steps = sum(c.steps_completed for c in conversations)
-            total_errors = sum(len(c.errors) for c in conversations)
-            avg_steps = total_steps / len(conversations) if conversations else 0
-            
-            # Verify responses
-            verified = 0
+            # Aggregate statistics in a single pass
+            completed = total_steps = total_errors = verified = 0
             for conv in conversations:
-                for i, msg in enumerate(conv.messages):
-                    if msg.get("bot"):
-                        is_valid, _ = self.verify_response(
-                            msg["bot"],
-                            f"step_{i+1}",
-                            flow_name
-                        )
-                        if is_valid:
-                            verified += 1
+                completed += conv.completed
+                total_steps += conv.steps_completed
+                total_errors += len(conv.errors)
+                verified += conv.verified_count
+            avg_steps = total_steps / len(conversations) if conversations else 0
             
             report["summary"][flow_name] = {
                 "total_conversations": len(conversations),
@@ -572,6 +658,7 @@ class TestMatrixGenerator:
             
             report["detailed_results"][flow_name] = [c.to_dict() for c in conversations]
         
+        self._cached_report = report
         return report
     
     def save_report(self, filename: Optional[str] = None, format: str = "json"):
@@ -586,27 +673,36 @@ class TestMatrixGenerator:
         report = self.generate_report()
         
         if format == "json":
-            with open(filename, 'w') as f:
-                json.dump(report, f, indent=2)
+            if orjson is not None:
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(report, f, indent=2)
         else:
-            # Save as text summary
+            # Save as text summary, built up in memory and written once
+            rule = "=" * 80
+            parts = [
+                f"{rule}\n",
+                "AUTOSHERPA BOT TEST MATRIX REPORT\n",
+                f"{rule}\n\n",
+                f"Test Date: {report['test_date']}\n\n",
+            ]
+            for flow_name, summary in report["summary"].items():
+                parts.append(
+                    f"\n{flow_name.upper().replace('_', ' ')} FLOW\n"
+                    f"{'-' * 80}\n"
+                    f"Total Conversations: {summary['total_conversations']}\n"
+                    f"Completed: {summary['completed']} ({summary['completion_rate']})\n"
+                    f"Total Steps: {summary['total_steps']}\n"
+                    f"Average Steps: {summary['average_steps']}\n"
+                    f"Total Errors: {summary['total_errors']}\n"
+                    f"Verified Responses: {summary['verified_responses']} ({summary['verification_rate']})\n"
+                )
+            parts.append(f"\n{rule}\n")
+            
             with open(filename, 'w') as f:
-                f.write("=" * 80 + "\n")
-                f.write("AUTOSHERPA BOT TEST MATRIX REPORT\n")
-                f.write("=" * 80 + "\n\n")
-                f.write(f"Test Date: {report['test_date']}\n\n")
-                
-                for flow_name, summary in report["summary"].items():
-                    f.write(f"\n{flow_name.upper().replace('_', ' ')} FLOW\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(f"Total Conversations: {summary['total_conversations']}\n")
-                    f.write(f"Completed: {summary['completed']} ({summary['completion_rate']})\n")
-                    f.write(f"Total Steps: {summary['total_steps']}\n")
-                    f.write(f"Average Steps: {summary['average_steps']}\n")
-                    f.write(f"Total Errors: {summary['total_errors']}\n")
-                    f.write(f"Verified Responses: {summary['verified_responses']} ({summary['verification_rate']})\n")
-                
-                f.write("\n" + "=" * 80 + "\n")
+                f.write("".join(parts))
         
         print(f"\n📄 Test report saved to: {filename}")
         return filename
@@ -621,30 +717,44 @@ async def main():
     print("=" * 60)
     
     generator = TestMatrixGenerator()
-    await generator.run_all_tests()
+    try:
+        await generator.run_all_tests()
+    finally:
+        # Write bookings still queued by the service booking flow before the loop closes
+        if service_booking_batcher:
+            try:
+                await service_booking_batcher.close()
+                print("✓ Pending service bookings written")
+            except Exception as e:
+                print(f"⚠ Service booking flush error: {e}")
     
     # Generate and save reports in both formats
     json_report = generator.save_report(format="json")
     txt_report = generator.save_report(format="txt")
     
-    # Print summary
-    print("\n" + "=" * 60)
-    print("TEST SUMMARY")
-    print("=" * 60)
+    # Print summary, buffered into a single write
+    rule = "=" * 60
+    parts = [f"\n{rule}\nTEST SUMMARY\n{rule}\n"]
     
     report = generator.generate_report()
     for flow_name, summary in report["summary"].items():
-        print(f"\n{flow_name.upper().replace('_', ' ')}:")
-        print(f"  Total Conversations: {summary['total_conversations']}")
-        print(f"  Completed: {summary['completed']} ({summary['completion_rate']})")
-        print(f"  Average Steps: {summary['average_steps']}")
-        print(f"  Errors: {summary['total_errors']}")
-        print(f"  Verified Responses: {summary['verified_responses']} ({summary['verification_rate']})")
+        parts.append(
+            f"\n{flow_name.upper().replace('_', ' ')}:\n"
+            f"  Total Conversations: {summary['total_conversations']}\n"
+            f"  Completed: {summary['completed']} ({summary['completion_rate']})\n"
+            f"  Average Steps: {summary['average_steps']}\n"
+            f"  Errors: {summary['total_errors']}\n"
+            f"  Verified Responses: {summary['verified_responses']} ({summary['verification_rate']})\n"
+        )
     
-    print("\n" + "=" * 60)
-    print(f"📄 JSON Report: {json_report}")
-    print(f"📄 Text Report: {txt_report}")
-    print("=" * 60)
+    parts.append(
+        f"\n{rule}\n"
+        f"📄 JSON Report: {json_report}\n"
+        f"📄 Text Report: {txt_report}\n"
+        f"{rule}\n"
+    )
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":
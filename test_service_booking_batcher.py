@@ -0,0 +1,142 @@
+"""Tests for batched service booking writes, using an in-memory fake pool."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional, Set, Tuple
+
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("dotenv")
+
+from database import CarDatabase, ServiceBookingBatcher
+
+
+class FakeConnection:
+    """Records inserts and rolls back (sub)transactions that raise, like savepoints."""
+
+    def __init__(self, missing_table: bool = False, bad_customers: Optional[Set[str]] = None):
+        self.missing_table = missing_table
+        self.bad_customers = bad_customers or set()
+        self.pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self.committed: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._depth = 0
+        self._next_id = 1
+
+    @asynccontextmanager
+    async def transaction(self):
+        mark = len(self.pending)
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            del self.pending[mark:]
+            raise
+        finally:
+            self._depth -= 1
+        if self._depth == 0:
+            self.committed.extend(self.pending)
+            self.pending.clear()
+
+    async def fetchval(self, sql: str, *args: Any) -> int:
+        table = "test_drive_bookings" if "test_drive_bookings" in sql else "service_bookings"
+        if table == "service_bookings" and self.missing_table:
+            raise RuntimeError('relation "service_bookings" does not exist')
+        # The customer name is the first column in service_bookings, the second in the fallback
+        customer_name = args[0] if table == "service_bookings" else args[1]
+        if customer_name in self.bad_customers:
+            raise RuntimeError(f"cannot insert {customer_name}")
+        self.pending.append((table, args))
+        self._next_id += 1
+        return self._next_id - 1
+
+
+class FakePool:
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def make_db(conn: FakeConnection) -> CarDatabase:
+    db = CarDatabase("postgresql://fake")
+    db._pool = FakePool(conn)
+    return db
+
+
+def booking(name: str, confirmation_id: Optional[str] = None) -> dict:
+    return {
+        "customer_name": name,
+        "phone_number": "9876543210",
+        "make": "Honda",
+        "model": "City",
+        "confirmation_id": confirmation_id,
+    }
+
+
+def test_failing_row_does_not_roll_back_batch():
+    conn = FakeConnection(bad_customers={"Bad"})
+    db = make_db(conn)
+
+    results = asyncio.run(db.create_service_bookings([booking("Raj"), booking("Bad"), booking("Priya")]))
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], int)
+    assert [args[0] for _, args in conn.committed] == ["Raj", "Priya"]
+
+
+def test_fallback_keeps_confirmation_id_and_is_isolated():
+    conn = FakeConnection(missing_table=True, bad_customers={"Bad"})
+    db = make_db(conn)
+
+    results = asyncio.run(db.create_service_bookings([
+        booking("Raj", "SB1ABC"),
+        booking("Bad", "SB2DEF"),
+        booking("Priya", "SB3GHI"),
+    ]))
+
+    assert isinstance(results[1], RuntimeError)
+    assert [(table, args[0]) for table, args in conn.committed] == [
+        ("test_drive_bookings", "SB1ABC"),
+        ("test_drive_bookings", "SB3GHI"),
+    ]
+
+
+def test_create_service_booking_raises_row_error():
+    db = make_db(FakeConnection(missing_table=True, bad_customers={"Bad"}))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(db.create_service_booking(customer_name="Bad", phone_number="9876543210"))
+
+
+def test_batcher_fails_only_the_failing_booking():
+    conn = FakeConnection(bad_customers={"Bad"})
+    batcher = ServiceBookingBatcher(make_db(conn), flush_interval=0.05)
+
+    async def run():
+        futures = [batcher.put(**booking(name)) for name in ("Raj", "Bad", "Priya")]
+        await batcher.close()
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], int)
+    assert len(conn.committed) == 2
+
+
+def test_batcher_close_writes_queued_bookings():
+    conn = FakeConnection()
+    batcher = ServiceBookingBatcher(make_db(conn), flush_interval=10.0)
+
+    async def run():
+        future = batcher.put(**booking("Raj"))
+        await batcher.close()
+        return await future
+
+    assert isinstance(asyncio.run(run()), int)
+    assert [args[0] for _, args in conn.committed] == ["Raj"]